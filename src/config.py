@@ -1,8 +1,9 @@
 # config.py
 import os
-import json
 import logging
 import sys
+import functools
+import threading
 import chromadb
 
 from llama_index.llms.ollama import Ollama
@@ -10,6 +11,8 @@ from llama_index.embeddings.ollama import OllamaEmbedding
 from llama_index.core import Settings
 from llama_index.vector_stores.chroma import ChromaVectorStore
 
+from .json_utils import json_loads, write_json_atomic
+
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(stream=sys.stdout))
@@ -25,43 +28,102 @@ DEFAULT_APP_CONFIG = {
     "manifest_file": "manifest.json",
 }
 
+# Parsed configuration cache, keyed on the config file's mtime so unchanged files are not reparsed.
+_CONFIG_CACHE = {"mtime": None, "data": None}
+
 def load_app_config():
-    """Loads the configuration from disk, or returns the default configuration if the file doesn't exist."""
-    if os.path.exists(APP_CONFIG_FILE):
+    """Loads the configuration from disk, or returns the default configuration if the file doesn't exist.
+    The parsed configuration is cached and only reloaded when the file's mtime changes.
+    """
+    try:
+        mtime = os.stat(APP_CONFIG_FILE).st_mtime
+    except FileNotFoundError:
+        mtime = None
+    except OSError as e:
+        logger.error(f"Error accessing config file: {e}")
+        mtime = None
+    if mtime is not None:
+        if mtime == _CONFIG_CACHE["mtime"]:
+            return _CONFIG_CACHE["data"]
         try:
-            with open(APP_CONFIG_FILE, "r") as f:
-                config = json.load(f)
+            with open(APP_CONFIG_FILE, "rb") as f:
+                config = json_loads(f.read())
                 logger.info(f"Loaded configuration from {APP_CONFIG_FILE}")
+                _CONFIG_CACHE.update(mtime=mtime, data=config)
                 return config
         except Exception as e:
             logger.error(f"Error loading config file: {e}")
+            # Cache the defaults under this mtime, so a malformed file is only reparsed after it changes.
+            logger.info("Using default configuration.")
+            config = DEFAULT_APP_CONFIG.copy()
+            _CONFIG_CACHE.update(mtime=mtime, data=config)
+            return config
+    # Reuse the cached defaults so repeated lookups without a config file share one mutable dict.
+    if _CONFIG_CACHE["mtime"] is None and _CONFIG_CACHE["data"] is not None:
+        return _CONFIG_CACHE["data"]
     logger.info("Using default configuration.")
-    return DEFAULT_APP_CONFIG.copy()
+    config = DEFAULT_APP_CONFIG.copy()
+    _CONFIG_CACHE.update(mtime=None, data=config)
+    return config
 
 def save_app_config(config):
-    """Saves the configuration to disk."""
+    """Atomically saves the configuration to disk and refreshes the config cache."""
     try:
-        with open(APP_CONFIG_FILE, "w") as f:
-            json.dump(config, f, indent=4)
+        stat_result = write_json_atomic(APP_CONFIG_FILE, config)
+        _CONFIG_CACHE.update(mtime=stat_result.st_mtime, data=config)
         logger.info(f"Configuration saved to {APP_CONFIG_FILE}")
     except Exception as e:
         logger.error(f"Error saving config file: {e}")
 
-# Load the configuration at module load time.
-APP_CONFIG = load_app_config()
+def get_app_config():
+    """Returns the application configuration, reparsing the config file only when its mtime changed."""
+    return load_app_config()
+
+# The documents directory and manifest file are tied to the running watcher, manifest and vector store
+# contents, so they are read once per process; changing them in the config takes effect on restart.
+@functools.lru_cache(maxsize=None)
+def get_documents_dir():
+    """Returns the documents directory, fixed for the lifetime of the process."""
+    return get_app_config()["documents_dir"]
+
+@functools.lru_cache(maxsize=None)
+def get_manifest_file():
+    """Returns the manifest file path, fixed for the lifetime of the process."""
+    return get_app_config()["manifest_file"]
+
+def __getattr__(name):
+    """Resolves configuration-derived module attributes lazily, so importing this module does not touch disk."""
+    if name == "APP_CONFIG":
+        return get_app_config()
+    if name == "DOCUMENTS_DIR":
+        return get_documents_dir()
+    if name == "MANIFEST_FILE":
+        return get_manifest_file()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Use the configuration to set up underlying settings.
-Settings.llm = Ollama(model=APP_CONFIG["llm"]["model"], request_timeout=APP_CONFIG["llm"]["request_timeout"])
-Settings.embed_model = OllamaEmbedding(model_name=APP_CONFIG["embed_model"]["model_name"], timeout=APP_CONFIG["embed_model"]["timeout"])
+_settings_initialized = False
+_settings_lock = threading.Lock()
 
-DOCUMENTS_DIR = APP_CONFIG["documents_dir"]
-MANIFEST_FILE = APP_CONFIG["manifest_file"]
+def _init_settings_once():
+    """Configures the global LlamaIndex LLM and embedding model on first use instead of at import time."""
+    global _settings_initialized
+    if _settings_initialized:
+        return
+    # The setup helpers may run concurrently in worker threads.
+    with _settings_lock:
+        if _settings_initialized:
+            return
+        app_config = get_app_config()
+        Settings.llm = Ollama(model=app_config["llm"]["model"], request_timeout=app_config["llm"]["request_timeout"])
+        Settings.embed_model = OllamaEmbedding(model_name=app_config["embed_model"]["model_name"], timeout=app_config["embed_model"]["timeout"])
+        _settings_initialized = True
 
 def setup_llama_chroma_db():
     """
     Sets up a persistent ChromaDB vector store and returns both the vector store
     and the underlying persistent client so that it can be explicitly persisted.
     """
+    _init_settings_once()
     chroma_client = chromadb.PersistentClient()
     chroma_collection = chroma_client.get_or_create_collection("rag_collection")
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
@@ -70,14 +132,17 @@ def setup_llama_chroma_db():
 
 def setup_llama_ollama_embedding():
     """Sets up Ollama as the embedding model in LlamaIndex."""
+    _init_settings_once()
     logger.debug("Setting up Ollama embedding model.")
-    ollama_embedding = OllamaEmbedding(model_name=APP_CONFIG["embed_model"]["model_name"],
-                                       timeout=APP_CONFIG["embed_model"]["timeout"])
+    app_config = get_app_config()
+    ollama_embedding = OllamaEmbedding(model_name=app_config["embed_model"]["model_name"],
+                                       timeout=app_config["embed_model"]["timeout"])
     logger.debug("Ollama embedding model setup complete.")
     return ollama_embedding
 
 def setup_ingestion_pipeline():
     """Sets up LlamaIndex ingestion pipeline with metadata extractors and text splitter."""
+    _init_settings_once()
     logger.debug("Setting up LlamaIndex ingestion pipeline.")
     from llama_index.core.extractors import TitleExtractor, SummaryExtractor, QuestionsAnsweredExtractor
     from llama_index.core.text_splitter import TokenTextSplitter
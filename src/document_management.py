@@ -1,144 +1,282 @@
 # document_management.py
 import os
+import asyncio
+import hashlib
 import logging
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple, Optional
 
-from llama_index.core import SimpleDirectoryReader, Document, VectorStoreIndex
-from .config import DOCUMENTS_DIR
+import numpy as np
+from llama_index.core import SimpleDirectoryReader, Document, StorageContext, VectorStoreIndex
+from .indexing import delete_documents_from_index, index_nodes_llamaindex
 from .manifest_utils import load_manifest, save_manifest  # Use centralized manifest handling
 
 logger = logging.getLogger(__name__)
 
-def load_documents_llamaindex(pdf_dir=".", file_paths=[]) -> List[Document]:
+# Per-document metadata, stored as a structured array parallel to a list of filenames.
+DOCUMENT_STATE_DTYPE = np.dtype([("mtime", "f8"), ("size", "i8")])
+
+# Stat and read calls release the GIL, so I/O-bound per-file work scales with threads.
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Set whenever the documents directory may have changed. Syncs are only skipped while a
+# filesystem watcher is running, since otherwise there is nothing to flip the flag back.
+_documents_dirty = True
+_documents_watched = False
+
+def mark_documents_dirty() -> None:
+    """Flags the documents directory as changed so the next sync performs a full pass."""
+    global _documents_dirty
+    _documents_dirty = True
+
+def set_documents_watched(watched: bool) -> None:
+    """
+    Records whether a filesystem watcher is keeping the dirty flag up to date.
+    Always marks the documents dirty, since changes may have been missed while switching.
+    """
+    global _documents_watched
+    _documents_watched = watched
+    mark_documents_dirty()
+
+def load_documents_llamaindex(pdf_dir: str = ".", file_paths: Optional[List[str]] = None) -> List[Document]:
     """Loads PDF documents from a directory using LlamaIndex.
        If file_paths is provided, only those files are loaded.
     """
+    file_paths = file_paths or []
     if file_paths:
         logger.debug(f"Loading documents from provided file paths: {file_paths}")
-        documents = SimpleDirectoryReader(input_files=file_paths).load_data()
+        documents = SimpleDirectoryReader(input_files=file_paths, filename_as_id=True).load_data()
     else:
         logger.debug(f"Loading documents from directory: {pdf_dir}")
-        documents = SimpleDirectoryReader(input_dir=pdf_dir, required_exts=[".pdf"]).load_data()
+        documents = SimpleDirectoryReader(input_dir=pdf_dir, required_exts=[".pdf"], filename_as_id=True).load_data()
     logger.debug(f"Documents loaded: {len(documents)}")
     if documents:
         logger.debug(f"First document content snippet: {documents[0].text[:100]}...")
     return documents
 
 
-def get_document_state(documents_dir: str) -> Dict[str, Tuple[float, int]]:
+def _stat_entry(entry: os.DirEntry) -> Optional[Tuple[str, float, int]]:
+    """Returns (filename, last modified timestamp, file size) for a directory entry, or None if it vanished."""
+    try:
+        stat_result = entry.stat(follow_symlinks=False)
+    except OSError as e:
+        logger.warning(f"Could not stat '{entry.path}': {e}")
+        return None
+    return entry.name, stat_result.st_mtime, stat_result.st_size
+
+def get_document_state(documents_dir: str) -> Tuple[List[str], np.ndarray]:
     """
-    Returns a dictionary representing the state of documents in the given directory.
-    Keys are filenames, values are tuples of (last modified timestamp, file size).
+    Returns the state of documents in the given directory as a list of filenames and
+    a parallel structured array of (mtime, size) records using DOCUMENT_STATE_DTYPE.
     """
-    document_state = {}
+    filenames = []
+    records = []
     try:
-        for filename in os.listdir(documents_dir):
-            if filename.endswith(".pdf"):
-                filepath = os.path.join(documents_dir, filename)
-                if os.path.isfile(filepath):
-                    last_modified = os.path.getmtime(filepath)
-                    file_size = os.path.getsize(filepath)
-                    document_state[filename] = (last_modified, file_size)
-    except Exception as e:
+        with os.scandir(documents_dir) as it:
+            entries = [
+                entry for entry in it
+                if entry.name.endswith(".pdf") and entry.is_file(follow_symlinks=False)
+            ]
+        # Fan the stat calls out so per-file latency on network filesystems overlaps.
+        with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+            for result in executor.map(_stat_entry, entries):
+                if result is not None:
+                    filename, last_modified, file_size = result
+                    filenames.append(filename)
+                    records.append((last_modified, file_size))
+    except OSError as e:
         logger.error(f"Error accessing documents directory '{documents_dir}': {e}")
-    logger.debug(f"Document state: {document_state}")
-    return document_state
+    document_state = np.array(records, dtype=DOCUMENT_STATE_DTYPE)
+    logger.debug(f"Document state: {dict(zip(filenames, document_state.tolist()))}")
+    return filenames, document_state
+
+def compute_file_hash(filepath: str) -> Optional[str]:
+    """
+    Returns a hex digest of the file's contents, hashed through a read-only memory map
+    so large PDFs are never copied into memory. Returns None if the file cannot be read.
+    """
+    try:
+        file_hash = hashlib.blake2b(digest_size=16)
+        with open(filepath, "rb") as f:
+            # Empty files cannot be memory-mapped.
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    file_hash.update(mapped)
+        return file_hash.hexdigest()
+    except OSError as e:
+        logger.error(f"Error hashing file '{filepath}': {e}")
+        return None
+
+def _path_prefix(documents_dir: str) -> str:
+    """
+    Returns `documents_dir` with exactly one trailing separator, so paths can be built by concatenation.
+    An empty `documents_dir` yields an empty prefix, keeping paths relative like os.path.join would.
+    """
+    if not documents_dir:
+        return ""
+    return documents_dir.rstrip("/" + os.sep) + os.sep
+
+def compute_file_hashes(documents_dir: str, filenames: List[str]) -> Dict[str, Optional[str]]:
+    """Hashes the given files in parallel. Returns a dictionary mapping filenames to hex digests."""
+    if not filenames:
+        return {}
+    prefix = _path_prefix(documents_dir)
+    filepaths = [prefix + filename for filename in filenames]
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+        return dict(zip(filenames, executor.map(compute_file_hash, filepaths)))
 
 async def sync_documents_with_vector_store(vector_store, embedding_model, ingestion_pipeline, 
                                              documents_dir: str, manifest_file: str, 
                                              existing_index=None) -> Optional[VectorStoreIndex]:
     """
     Synchronizes documents in `documents_dir` with the vector store.
-    If only new documents are detected, they are inserted incrementally.
-    Full re-indexing is triggered only if documents were updated or deleted.
+    New documents are inserted incrementally, updated documents are removed and
+    re-inserted, and deleted documents are removed; unchanged documents are never re-embedded.
+    """
+    global _documents_dirty
+    if _documents_watched and not _documents_dirty and existing_index is not None:
+        logger.debug("No filesystem changes since the last sync; skipping synchronization.")
+        return existing_index
+    # Clear the flag before scanning, so changes arriving mid-sync trigger another pass next time.
+    _documents_dirty = False
+
+    try:
+        index, indexing_failed = await _sync_documents(
+            vector_store, embedding_model, ingestion_pipeline, documents_dir, manifest_file, existing_index
+        )
+    except Exception:
+        # Failed documents may already be removed from the index; make sure the next sync retries them.
+        mark_documents_dirty()
+        raise
+    if indexing_failed:
+        mark_documents_dirty()
+    return index
+
+async def _sync_documents(vector_store, embedding_model, ingestion_pipeline,
+                          documents_dir: str, manifest_file: str,
+                          existing_index) -> Tuple[Optional[VectorStoreIndex], bool]:
+    """
+    Performs one synchronization pass for sync_documents_with_vector_store.
+    Returns the index and whether indexing of new or updated documents failed.
     """
     logger.info("Starting document synchronization with vector store.")
-    current_document_state = get_document_state(documents_dir)
-    manifest_data = load_manifest(manifest_file)
+    # Filesystem, parsing, embedding and vector store calls block, so they run in worker threads
+    # to keep the event loop free for other requests while a sync is in progress.
+    current_filenames, current_document_state = await asyncio.to_thread(get_document_state, documents_dir)
+    manifest_data = await asyncio.to_thread(load_manifest, manifest_file)
 
-    docs_to_add = []
-    docs_to_update = []
-    filenames_to_delete = []
     index_updated = False
     index_to_return = existing_index
 
-    # Determine which documents are new, updated, or deleted.
-    for filename, (last_modified, file_size) in current_document_state.items():
-        if filename not in manifest_data:
-            logger.info(f"New document detected: {filename}")
-            docs_to_add.append(os.path.join(documents_dir, filename))
-        else:
-            old_entry = manifest_data.get(filename, {})
-            old_last_modified = old_entry.get('last_modified')
-            old_file_size = old_entry.get('file_size')
-            if old_last_modified is None or old_file_size is None:
-                logger.warning(f"Incomplete manifest entry for {filename}. Marking for update.")
-                docs_to_update.append(os.path.join(documents_dir, filename))
-            elif last_modified > old_last_modified or file_size != old_file_size:
-                logger.info(f"Document updated: {filename}")
-                docs_to_update.append(os.path.join(documents_dir, filename))
-    # Identify deleted documents.
-    for filename in manifest_data:
-        if filename not in current_document_state and filename.endswith(".pdf"):
-            logger.info(f"Document deleted: {filename}")
-            filenames_to_delete.append(filename)
-
-    # Case 1: If there are any updates or deletions, re-index all documents.
-    if docs_to_update or filenames_to_delete:
-        logger.info("Updates or deletions detected; performing full re-indexing.")
-        all_documents = load_documents_llamaindex(pdf_dir=documents_dir)
-        if all_documents:
-            try:
-                index_to_return = VectorStoreIndex.from_documents(
-                    all_documents,
-                    vector_store=vector_store,
+    # Classify documents with set operations over the filenames on disk and in the manifest.
+    row_by_filename = {filename: row for row, filename in enumerate(current_filenames)}
+    manifest_filenames = manifest_data.keys()
+    added = row_by_filename.keys() - manifest_filenames
+    removed = {f for f in manifest_filenames - row_by_filename.keys() if f.endswith(".pdf")}
+    common = row_by_filename.keys() & manifest_filenames
+    incomplete = {
+        f for f in common
+        if manifest_data[f].get('last_modified') is None or manifest_data[f].get('file_size') is None
+    }
+
+    # Align the manifest with the current state and compare mtimes and sizes in one vectorized pass.
+    comparable = sorted(common - incomplete)
+    current_rows = current_document_state[[row_by_filename[f] for f in comparable]]
+    manifest_rows = np.array(
+        [(manifest_data[f]['last_modified'], manifest_data[f]['file_size']) for f in comparable],
+        dtype=DOCUMENT_STATE_DTYPE,
+    )
+    changed_mask = (current_rows["mtime"] > manifest_rows["mtime"]) | (current_rows["size"] != manifest_rows["size"])
+    metadata_changed = {f for f, changed in zip(comparable, changed_mask.tolist()) if changed}
+    missing_hash = {f for f in common if manifest_data[f].get('hash') is None}
+
+    # Hash every file whose hash is unknown or possibly stale in one parallel pass.
+    file_hashes = await asyncio.to_thread(
+        compute_file_hashes, documents_dir, sorted(added | incomplete | metadata_changed | missing_hash)
+    )
+    for filename in common:
+        file_hashes.setdefault(filename, manifest_data[filename].get('hash'))
+
+    # Metadata changes only count as updates if the contents actually differ.
+    touched = {
+        f for f in metadata_changed
+        if manifest_data[f].get('hash') is not None and file_hashes[f] == manifest_data[f]['hash']
+    }
+    updated = incomplete | (metadata_changed - touched)
+
+    for filename in sorted(added):
+        logger.info(f"New document detected: {filename}")
+    for filename in sorted(incomplete):
+        logger.warning(f"Incomplete manifest entry for {filename}. Marking for update.")
+    for filename in sorted(touched):
+        logger.info(f"Document {filename} touched but contents unchanged; skipping re-index.")
+    for filename in sorted(metadata_changed - touched):
+        logger.info(f"Document updated: {filename}")
+    for filename in sorted(removed):
+        logger.info(f"Document deleted: {filename}")
+
+    prefix = _path_prefix(documents_dir)
+    docs_to_add = [prefix + filename for filename in sorted(added)]
+    docs_to_update = [prefix + filename for filename in sorted(updated)]
+    filenames_to_delete = sorted(removed)
+
+    if not (docs_to_add or docs_to_update or filenames_to_delete):
+        logger.info("No changes detected; index remains unchanged.")
+
+    # Case 1: Remove updated and deleted documents from the index; unchanged documents are left alone.
+    filenames_to_remove = filenames_to_delete + sorted(updated)
+    if index_to_return is not None and filenames_to_remove:
+        await asyncio.to_thread(delete_documents_from_index, index_to_return, filenames_to_remove)
+        index_updated = True
+
+    # Case 2: Load new and updated documents once and insert them through a single pipeline pass.
+    docs_to_index = docs_to_add + docs_to_update
+    indexing_failed = False
+    if docs_to_index:
+        logger.info(f"Indexing {len(docs_to_add)} new and {len(docs_to_update)} updated documents.")
+        documents_to_index = await asyncio.to_thread(load_documents_llamaindex, file_paths=docs_to_index)
+        if documents_to_index:
+            if index_to_return is None:
+                # Start from an empty index so documents are embedded only once, by the pipeline pass below.
+                logger.info("No existing index found; creating an empty index on the vector store.")
+                index_to_return = VectorStoreIndex(
+                    nodes=[],
+                    storage_context=StorageContext.from_defaults(vector_store=vector_store),
                     embed_model=embedding_model,
+                    store_nodes_override=False,
+                    show_progress=False,
                 )
+            try:
                 nodes = await ingestion_pipeline.arun(
-                    documents=all_documents, in_place=True, show_progress=True
+                    documents=documents_to_index, in_place=True, show_progress=True
                 )
-                from indexing import index_nodes_llamaindex
-                index_nodes_llamaindex(index_to_return, embedding_model, nodes)
-                logger.info("Full re-indexing complete for updated/deleted documents.")
+                # Append the nodes into the index.
+                await asyncio.to_thread(index_nodes_llamaindex, index_to_return, embedding_model, nodes)
+                logger.info(f"Incrementally indexed {len(docs_to_index)} documents.")
                 index_updated = True
             except Exception as e:
-                logger.error(f"Error during re-indexing: {e}")
+                logger.error(f"Error indexing new and updated documents: {e}")
+                indexing_failed = True
         else:
-            logger.warning("No documents available for re-indexing.")
-    # Case 2: If there are only new documents, insert them incrementally.
-    elif docs_to_add:
-        logger.info("Only new documents detected; inserting incrementally.")
-        # Assume load_documents_llamaindex can be given a list of file paths.
-        new_documents = load_documents_llamaindex(file_paths=docs_to_add)
-        if new_documents:
-            if index_to_return is None:
-                logger.info("No existing index found; creating a new index from new documents.")
-                index_to_return = VectorStoreIndex.from_documents(
-                    new_documents,
-                    vector_store=vector_store,
-                    embed_model=embedding_model,
-                )
-            else:
-                try:
-                    new_nodes = await ingestion_pipeline.arun(
-                        documents=new_documents, in_place=True, show_progress=True
-                    )
-                    from indexing import index_nodes_llamaindex
-                    # Append new nodes into the existing index.
-                    index_nodes_llamaindex(index_to_return, embedding_model, new_nodes)
-                    logger.info(f"Incrementally indexed {len(new_documents)} new documents.")
-                    index_updated = True
-                except Exception as e:
-                    logger.error(f"Error inserting new documents: {e}")
-        else:
-            logger.warning("No new documents were loaded despite detection.")
-    else:
-        logger.info("No changes detected; index remains unchanged.")
+            logger.warning("No documents were loaded despite detected changes.")
+            indexing_failed = True
 
-    # Always update the manifest.
+    # Only rewrite the manifest when something changed.
     updated_manifest_data = {
-        filename: {"last_modified": lm, "file_size": sz}
-        for filename, (lm, sz) in current_document_state.items()
+        filename: {"last_modified": lm, "file_size": sz, "hash": file_hashes.get(filename)}
+        for filename, (lm, sz) in zip(current_filenames, current_document_state.tolist())
     }
-    save_manifest(updated_manifest_data, manifest_file)
-    return index_to_return
+    if indexing_failed:
+        # Keep the previous entries (or none, for new files) so the next sync retries these documents.
+        for filename in added | updated:
+            if filename in manifest_data:
+                updated_manifest_data[filename] = manifest_data[filename]
+            else:
+                updated_manifest_data.pop(filename, None)
+        logger.warning(f"Indexing failed; {len(added | updated)} documents will be retried on the next sync.")
+    if updated_manifest_data != manifest_data:
+        await asyncio.to_thread(save_manifest, updated_manifest_data, manifest_file)
+    else:
+        logger.debug("Manifest unchanged; skipping write.")
+    return index_to_return, indexing_failed
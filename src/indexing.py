@@ -2,14 +2,17 @@
 import os
 import logging
 from llama_index.core import VectorStoreIndex
+from llama_index.core.schema import MetadataMode
+from llama_index.core.vector_stores import FilterOperator, MetadataFilter, MetadataFilters
 
-from .config import MANIFEST_FILE
+from .config import get_manifest_file
 
 logger = logging.getLogger(__name__)
 
 def index_nodes_llamaindex(index, embedding_model, nodes):
     """
     Indexes pre-processed nodes into the vector store using LlamaIndex.
+    Errors are logged and re-raised so callers can retry the affected documents.
     """
     logger.debug("Starting index_nodes_llamaindex.")
     if not nodes:
@@ -21,25 +24,58 @@ def index_nodes_llamaindex(index, embedding_model, nodes):
         # Log first few node IDs for debugging.
         for i, node in enumerate(nodes[:5]):
             logger.debug(f"Node {i+1}: {node.node_id}")
+        # Embed all pending nodes in one batched call; insert_nodes skips nodes that already have embeddings.
+        nodes_to_embed = [node for node in nodes if node.embedding is None]
+        if nodes_to_embed:
+            texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes_to_embed]
+            embeddings = embedding_model.get_text_embedding_batch(texts, show_progress=True)
+            for node, embedding in zip(nodes_to_embed, embeddings):
+                node.embedding = embedding
         index.insert_nodes(nodes, embed_model=embedding_model)
         logger.info(f"Successfully indexed {len(nodes)} nodes.")
 
-        # Optionally verify node count in the vector store (for ChromaDB).
+        # Optionally verify node count in the vector store (for ChromaDB); only at debug level, as it costs a round-trip.
+        if logger.isEnabledFor(logging.DEBUG):
+            vector_store = index.vector_store
+            if hasattr(vector_store, '_collection'):
+                node_count = vector_store._collection.count()
+                logger.debug(f"Vector store now contains {node_count} nodes.")
+            else:
+                logger.debug("Vector store does not support node count retrieval.")
+    except Exception as e:
+        logger.error(f"Error during node indexing: {e}")
+        raise
+    logger.debug("Exiting index_nodes_llamaindex.")
+    return index
+
+def delete_documents_from_index(index, filenames):
+    """
+    Removes all nodes belonging to the given files from the index, matching on `file_name` metadata.
+    For ChromaDB all files are deleted in a single request on the underlying collection;
+    other vector stores use a metadata-filtered delete_nodes call.
+    """
+    if not filenames:
+        return index
+
+    try:
         vector_store = index.vector_store
         if hasattr(vector_store, '_collection'):
-            node_count = vector_store._collection.count()
-            logger.info(f"Vector store now contains {node_count} nodes.")
+            vector_store._collection.delete(where={"file_name": {"$in": list(filenames)}})
         else:
-            logger.warning("Vector store does not support node count retrieval.")
+            vector_store.delete_nodes(filters=MetadataFilters(filters=[
+                MetadataFilter(key="file_name", value=list(filenames), operator=FilterOperator.IN)
+            ]))
+        logger.info(f"Removed {len(filenames)} documents from the index: {filenames}")
     except Exception as e:
-        logger.error(f"Error during node indexing: {e}")
-    logger.debug("Exiting index_nodes_llamaindex.")
+        logger.error(f"Error removing documents from the index: {e}")
     return index
 
-def load_existing_index(vector_store, manifest_file=MANIFEST_FILE):
+def load_existing_index(vector_store, manifest_file=None):
     """Loads an existing LlamaIndex index from disk if it exists, otherwise returns None.
     Forces re-indexing if manifest exists but index directory is missing.
     """
+    if manifest_file is None:
+        manifest_file = get_manifest_file()
     try:
         index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
         return index
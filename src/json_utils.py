@@ -0,0 +1,43 @@
+# json_utils.py
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    def json_loads(data: bytes):
+        """Parses JSON bytes using orjson."""
+        return orjson.loads(data)
+
+    def json_dumps(obj) -> bytes:
+        """Serializes an object to indented JSON bytes using orjson."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    import json
+
+    logger.debug("orjson not available; falling back to the standard json module.")
+
+    def json_loads(data: bytes):
+        """Parses JSON bytes using the standard json module."""
+        return json.loads(data)
+
+    def json_dumps(obj) -> bytes:
+        """Serializes an object to indented JSON bytes using the standard json module."""
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+
+def write_json_atomic(path: str, obj) -> os.stat_result:
+    """
+    Writes an object as JSON to a temporary file, fsyncs it and renames it over `path`,
+    so readers never observe a partially written file. Returns the stat of the written file.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json_dumps(obj))
+        f.flush()
+        os.fsync(f.fileno())
+        stat_result = os.fstat(f.fileno())
+    os.replace(tmp_path, path)
+    return stat_result
@@ -1,36 +1,36 @@
 # main.py
+import asyncio
 import logging
 import sys
 from .config import (
-    DOCUMENTS_DIR,
+    get_documents_dir,
     setup_llama_chroma_db,
     setup_llama_ollama_embedding,
     setup_ingestion_pipeline,
 )
-from document_management import sync_documents_with_vector_store
-from indexing import load_existing_index
-from querying import query_llamaindex_rag
+from .document_management import sync_documents_with_vector_store
+from .indexing import load_existing_index
+from .querying import build_query_engine, query_llamaindex_rag
 from llama_index.core.storage.chat_store import SimpleChatStore
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 CHATSTORE_PERSIST_PATH = "chat_store.json"
-def main():
+async def async_main():
     try:
-        pdf_directory = DOCUMENTS_DIR
-
-        # Setup persistent ChromaDB vector store and get the persistent client.
-        vector_store, chroma_client = setup_llama_chroma_db()
-
-        # Setup Ollama embedding model.
-        ollama_embed_model = setup_llama_ollama_embedding()
+        pdf_directory = get_documents_dir()
 
-        # Setup Ingestion Pipeline.
-        ingestion_pipeline = setup_ingestion_pipeline()
+        # Setup the persistent ChromaDB vector store, Ollama embedding model and ingestion pipeline.
+        # These are independent and block on I/O, so run them concurrently in worker threads.
+        (vector_store, chroma_client), ollama_embed_model, ingestion_pipeline = await asyncio.gather(
+            asyncio.to_thread(setup_llama_chroma_db),
+            asyncio.to_thread(setup_llama_ollama_embedding),
+            asyncio.to_thread(setup_ingestion_pipeline),
+        )
 
         # Load existing index if available.
         index = load_existing_index(vector_store)
-        index = sync_documents_with_vector_store(
+        index = await sync_documents_with_vector_store(
             vector_store,
             ollama_embed_model,
             ingestion_pipeline,
@@ -47,15 +47,15 @@ def main():
 
         if index is not None:
             # Persist the Llama index.
-            index_load_query = load_existing_index(vector_store)
             index_load_query = index
             logger.info(index.vector_store)
             if index_load_query:
+                query_engine = build_query_engine(index_load_query)
                 while True:
-                    user_query = input("\nEnter your query (or type 'exit' to quit): ").strip()
+                    user_query = (await asyncio.to_thread(input, "\nEnter your query (or type 'exit' to quit): ")).strip()
                     if user_query.lower() == 'exit':
                         break
-                    response = query_llamaindex_rag(index_load_query, user_query)
+                    response = await query_llamaindex_rag(index_load_query, user_query, query_engine=query_engine)
                     if response:
                         logger.info(f"Query Response:\n{response}")
                         logger.info(f"Used sources: {response.source_nodes}")
@@ -68,5 +68,8 @@ def main():
     except Exception as e:
         logger.error(f"An unexpected error occurred in main(): {e}")
 
+def main():
+    asyncio.run(async_main())
+
 if __name__ == "__main__":
     main()
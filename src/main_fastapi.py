@@ -1,23 +1,30 @@
 # main_fastapi.py
 import os
 import shutil
+import asyncio
 import logging
 
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
+from watchfiles import awatch
 
 from .config import (
-    DOCUMENTS_DIR,
-    MANIFEST_FILE,
+    get_app_config,
+    get_documents_dir,
+    get_manifest_file,
     setup_llama_chroma_db,
     setup_llama_ollama_embedding,
     setup_ingestion_pipeline,
-    APP_CONFIG,
     save_app_config,
 )
-from .document_management import get_document_state, sync_documents_with_vector_store
+from .document_management import (
+    get_document_state,
+    mark_documents_dirty,
+    set_documents_watched,
+    sync_documents_with_vector_store,
+)
 from .indexing import load_existing_index
-from .querying import query_llamaindex_rag
+from .querying import build_query_engine, query_llamaindex_rag
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -30,62 +37,134 @@ chroma_client = None
 embedding_model = None
 ingestion_pipeline = None
 index = None
+watch_task = None
+# Uploads and deletions only request a sync; a single background pass serves every request made before it starts.
+sync_lock = asyncio.Lock()
+sync_pending = False
+sync_tasks = set()
+app.state.query_engine = None
+
+def set_index(new_index):
+    """Replaces the global index, rebuilding the cached query engine only if the index object changed."""
+    global index
+    if new_index is not index or app.state.query_engine is None:
+        app.state.query_engine = build_query_engine(new_index) if new_index is not None else None
+    index = new_index
+
+async def watch_documents_dir():
+    """
+    Flags the documents as dirty and schedules a sync whenever the documents directory changes.
+    Syncs requested while nothing has changed return immediately.
+    """
+    documents_dir = get_documents_dir()
+    set_documents_watched(True)
+    try:
+        async for changes in awatch(documents_dir, recursive=False):
+            logger.debug(f"Filesystem changes in '{documents_dir}': {changes}")
+            mark_documents_dirty()
+            schedule_sync()
+    except Exception as e:
+        logger.error(f"Error watching documents directory '{documents_dir}': {e}")
+    finally:
+        set_documents_watched(False)
+
+async def sync_index():
+    """Synchronizes the documents directory with the vector store and swaps in the resulting index."""
+    set_index(await sync_documents_with_vector_store(
+        vector_store,
+        embedding_model,
+        ingestion_pipeline,
+        get_documents_dir(),
+        get_manifest_file(),
+        existing_index=index,
+    ))
+
+async def run_sync_if_needed():
+    """Runs sync passes until no further sync has been requested."""
+    global sync_pending
+    async with sync_lock:
+        while sync_pending:
+            # Clear before syncing, so requests arriving mid-sync trigger one more pass.
+            sync_pending = False
+            try:
+                await sync_index()
+            except Exception as e:
+                logger.error(f"Error during background synchronization: {e}")
+
+def schedule_sync():
+    """Requests a background sync; bursts of requests collapse into one or two sync passes."""
+    global sync_pending
+    sync_pending = True
+    task = asyncio.create_task(run_sync_if_needed())
+    # Keep a reference so the task is not garbage collected before it finishes.
+    sync_tasks.add(task)
+    task.add_done_callback(sync_tasks.discard)
+
+def save_upload(source, destination: str):
+    """Copies an uploaded file to disk in 1 MiB chunks."""
+    with open(destination, "wb") as f:
+        shutil.copyfileobj(source, f, length=1024 * 1024)
 
 @app.on_event("startup")
 async def startup_event():
     """
     Initializes the vector store, embedding model, ingestion pipeline,
-    loads (and synchronizes) the index at startup.
+    starts watching the documents directory, and loads (and synchronizes) the index at startup.
     """
-    global vector_store, chroma_client, embedding_model, ingestion_pipeline, index
+    global vector_store, chroma_client, embedding_model, ingestion_pipeline, watch_task
+    watch_task = asyncio.create_task(watch_documents_dir())
     vector_store, chroma_client = setup_llama_chroma_db()
     embedding_model = setup_llama_ollama_embedding()
     ingestion_pipeline = setup_ingestion_pipeline()
-    index = load_existing_index(vector_store)
-    index = await sync_documents_with_vector_store(
-        vector_store,
-        embedding_model,
-        ingestion_pipeline,
-        DOCUMENTS_DIR,
-        MANIFEST_FILE,
-        existing_index=index,
-    )
+    # Hold the sync lock so watcher-triggered syncs wait for the initial pass.
+    async with sync_lock:
+        set_index(await sync_documents_with_vector_store(
+            vector_store,
+            embedding_model,
+            ingestion_pipeline,
+            get_documents_dir(),
+            get_manifest_file(),
+            existing_index=load_existing_index(vector_store),
+        ))
     logger.info("Startup complete. Index synchronized.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stops the documents directory watcher."""
+    if watch_task is not None:
+        watch_task.cancel()
+
 # -------------------------
 # Documents Endpoints
 # -------------------------
 
 @app.get("/documents")
 def get_documents():
-    document_state = get_document_state(DOCUMENTS_DIR)
-    return document_state
+    filenames, document_state = get_document_state(get_documents_dir())
+    return dict(zip(filenames, document_state.tolist()))
 
 @app.post("/documents")
 async def add_document(file: UploadFile = File(...)):
+    """
+    Saves the uploaded PDF without blocking the event loop and schedules indexing
+    in the background; poll GET /documents to see the stored files.
+    """
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
-    file_location = os.path.join(DOCUMENTS_DIR, file.filename)
+    file_location = os.path.join(get_documents_dir(), file.filename)
     try:
-        with open(file_location, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        await asyncio.to_thread(save_upload, file.file, file_location)
     except Exception as e:
         logger.error(f"Error saving file: {e}")
         raise HTTPException(status_code=500, detail="Failed to save the file.")
-    global index
-    index = await sync_documents_with_vector_store(
-        vector_store,
-        embedding_model,
-        ingestion_pipeline,
-        DOCUMENTS_DIR,
-        MANIFEST_FILE,
-        existing_index=index,
-    )
-    return {"message": f"File '{file.filename}' uploaded and indexed successfully."}
+    # Don't rely on the watcher having seen the write; it may report it late or not at all.
+    mark_documents_dirty()
+    schedule_sync()
+    return {"message": f"File '{file.filename}' uploaded; indexing scheduled."}
 
 @app.delete("/documents/{filename}")
 async def delete_document(filename: str):
-    file_path = os.path.join(DOCUMENTS_DIR, filename)
+    file_path = os.path.join(get_documents_dir(), filename)
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found.")
     try:
@@ -93,16 +172,9 @@ async def delete_document(filename: str):
     except Exception as e:
         logger.error(f"Error deleting file: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete the file.")
-    global index
-    index = await sync_documents_with_vector_store(
-        vector_store,
-        embedding_model,
-        ingestion_pipeline,
-        DOCUMENTS_DIR,
-        MANIFEST_FILE,
-        existing_index=index,
-    )
-    return {"message": f"File '{filename}' deleted and index updated."}
+    mark_documents_dirty()
+    schedule_sync()
+    return {"message": f"File '{filename}' deleted; index update scheduled."}
 
 # -------------------------
 # Chat Endpoint
@@ -113,10 +185,9 @@ async def chat(query: dict):
     query_text = query.get("query")
     if not query_text:
         raise HTTPException(status_code=400, detail="Query text is required.")
-    global index
     if index is None:
         raise HTTPException(status_code=500, detail="Index not available for querying.")
-    response = await query_llamaindex_rag(index, query_text)
+    response = await query_llamaindex_rag(index, query_text, query_engine=app.state.query_engine)
     if response is None:
         raise HTTPException(status_code=500, detail="Query failed.")
     return {"response": str(response), "sources": str(response.source_nodes)}
@@ -127,14 +198,21 @@ async def chat(query: dict):
 
 @app.get("/config")
 def get_config():
-    return APP_CONFIG
+    return get_app_config()
 
 @app.put("/config")
 def update_config(new_config: dict):
     """
     Updates the global configuration, persists the changes to disk,
-    and returns the updated configuration.
+    and returns the updated configuration. Changes to the documents directory
+    or manifest file are persisted but only take effect after a restart.
     """
-    APP_CONFIG.update(new_config)
-    save_app_config(APP_CONFIG)
-    return {"message": "Configuration updated successfully.", "config": APP_CONFIG}
+    app_config = get_app_config()
+    app_config.update(new_config)
+    save_app_config(app_config)
+    message = "Configuration updated successfully."
+    if (app_config.get("documents_dir") != get_documents_dir()
+            or app_config.get("manifest_file") != get_manifest_file()):
+        logger.warning("documents_dir/manifest_file changes take effect after a restart.")
+        message += " Changes to documents_dir or manifest_file take effect after a restart."
+    return {"message": message, "config": app_config}
@@ -1,8 +1,9 @@
 # manifest_utils.py
-import json
 import logging
 import os
 
+from .json_utils import json_loads, write_json_atomic
+
 logger = logging.getLogger(__name__)
 
 def load_manifest(manifest_file: str) -> dict:
@@ -12,8 +13,8 @@ def load_manifest(manifest_file: str) -> dict:
     """
     try:
         if os.path.exists(manifest_file):
-            with open(manifest_file, 'r') as f:
-                manifest = json.load(f)
+            with open(manifest_file, 'rb') as f:
+                manifest = json_loads(f.read())
                 logger.debug(f"Loaded manifest from '{manifest_file}': {manifest}")
                 return manifest
         else:
@@ -25,11 +26,10 @@ def load_manifest(manifest_file: str) -> dict:
 
 def save_manifest(manifest: dict, manifest_file: str) -> None:
     """
-    Saves the manifest to a JSON file and handles errors gracefully.
+    Atomically saves the manifest to a JSON file and handles errors gracefully.
     """
     try:
-        with open(manifest_file, 'w') as f:
-            json.dump(manifest, f, indent=4)
+        write_json_atomic(manifest_file, manifest)
         logger.debug(f"Saved manifest to '{manifest_file}': {manifest}")
     except Exception as e:
         logger.error(f"Error saving manifest file '{manifest_file}': {e}")
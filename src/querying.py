@@ -4,22 +4,28 @@ from .vectorstore_utils import check_chroma_collection  # Import the helper
 from llama_index.core.indices import VectorStoreIndex
 logger = logging.getLogger(__name__)
 
-async def query_llamaindex_rag(index: VectorStoreIndex, query_text):
+def build_query_engine(index: VectorStoreIndex):
+    """Builds the query engine used to answer queries against the given index."""
+    return index.as_query_engine(
+        similarity_top_k=2,
+        node_postprocessors=[
+            ]
+    )
+
+async def query_llamaindex_rag(index: VectorStoreIndex, query_text, query_engine=None):
     """
     Queries the LlamaIndex RAG system and returns the response.
-    Logs extra debugging information about the underlying Chroma collection.
+    Reuses `query_engine` if given, otherwise builds one for `index`.
+    Logs extra debugging information about the underlying Chroma collection at debug level.
     """
     logger.info(f"Querying LlamaIndex RAG system with query: '{query_text}'")
     
-    # Check the underlying vector store (Chroma) contents.
-    if hasattr(index, "vector_store"):
+    # Check the underlying vector store (Chroma) contents; skipped outside debug logging to save a round-trip.
+    if logger.isEnabledFor(logging.DEBUG) and hasattr(index, "vector_store"):
         check_chroma_collection(index.vector_store)
     try:
-        query_engine = index.as_query_engine(
-            similarity_top_k=2,
-            node_postprocessors=[
-                ]
-        )
+        if query_engine is None:
+            query_engine = build_query_engine(index)
         response = await query_engine.aquery(query_text)
         logger.debug(f"Response source nodes: {response.source_nodes}")
         return response